@@ -7,88 +7,278 @@ and modern Python practices.
 """
 
 import argparse
+import errno
+import hashlib
+import json
+import logging
 import os
 import shutil
+import signal
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, Optional, List
+
+_CUDA = Path("/usr/local/cuda")
+_CUPTI = _CUDA / "extras" / "CUPTI"
+
+# Persisted result of sourcing Spack's setup-env.sh, relative to the install directory
+SPACK_ENV_CACHE = ".spack_env.cache"
+
+# Variables bash sets per invocation; never part of Spack's environment
+_SHELL_VOLATILE_VARS = frozenset({"_", "SHLVL", "PWD", "OLDPWD"})
+
+# Signals Python ignores that children should see at their defaults, as with
+# subprocess's restore_signals=True
+_RESTORED_SIGNALS = tuple(getattr(signal, name) for name in ("SIGPIPE", "SIGXFZ", "SIGXFSZ")
+                          if hasattr(signal, name))
+
+# Default upper bound on parallel build jobs, overridable with GPA_MAX_BUILD_JOBS;
+# keeps many-core, low-memory CI runners from OOMing
+MAX_BUILD_JOBS = 32
+
+def _env_positive_int(name: str) -> Optional[int]:
+    """Return a positive integer environment variable, or None when unset."""
+    value = os.environ.get(name)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    return number
+
+def max_build_jobs() -> int:
+    """Return the build job cap: GPA_MAX_BUILD_JOBS, or MAX_BUILD_JOBS."""
+    limit = _env_positive_int("GPA_MAX_BUILD_JOBS")
+    return MAX_BUILD_JOBS if limit is None else limit
+
+def clamp_build_jobs(jobs: int) -> int:
+    """Limit a requested job count to max_build_jobs(), warning if it is reduced."""
+    if jobs < 1:
+        raise ValueError(f"build jobs must be a positive integer, got {jobs}")
+    limit = max_build_jobs()
+    if jobs > limit:
+        logging.getLogger(__name__).warning(
+            f"Reducing build jobs from {jobs} to {limit}; set GPA_MAX_BUILD_JOBS to allow more")
+        return limit
+    return jobs
+
+def default_build_jobs() -> int:
+    """Return the number of parallel build jobs to use when none is given.
+
+    GPA_BUILD_JOBS counts as an explicit request; otherwise the CPU count is
+    used, capped at max_build_jobs() without a warning.
+    """
+    requested = _env_positive_int("GPA_BUILD_JOBS")
+    if requested is not None:
+        return clamp_build_jobs(requested)
+    return min(os.cpu_count() or 8, max_build_jobs())
+
+def _positive_int(value: str) -> int:
+    """argparse type for strictly positive integers."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
+def _link_or_copy(src: str, dst: str) -> str:
+    """copytree copy_function that hardlinks files, copying only across devices."""
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        # copy2 already uses zero-copy sendfile on Linux
+        shutil.copy2(src, dst)
+    return dst
 
 class GPAInstaller:
     """Handles GPA installation with modern Python practices."""
 
-    def __init__(self, install_dir: Path, spack_dir: Optional[Path] = None):
+    _logger: Optional[logging.Logger] = None
+
+    def __init__(self, install_dir: Path, spack_dir: Optional[Path] = None,
+                 jobs: Optional[int] = None, source_dir: Optional[Path] = None,
+                 verbose: bool = False):
+        self.logger = self._setup_logging()
         self.install_dir = install_dir
         self.spack_dir = spack_dir
-        self.source_dir = Path.cwd()
-        self.logger = self._setup_logging()
-
-    def _setup_logging(self):
+        self.jobs = clamp_build_jobs(jobs) if jobs is not None else default_build_jobs()
+        self.source_dir = source_dir or Path.cwd()
+        self.verbose = verbose
+        self._spack_env_cache: Dict[Path, dict] = {}
+        if verbose:
+            self.logger.setLevel(logging.DEBUG)
+
+    @classmethod
+    def _setup_logging(cls) -> logging.Logger:
         """Set up logging for installation process."""
-        import logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        return logging.getLogger(__name__)
+        if cls._logger is None:
+            if not logging.getLogger().handlers:
+                logging.basicConfig(
+                    level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s'
+                )
+            cls._logger = logging.getLogger(__name__)
+        return cls._logger
 
     def run_command(self, command: List[str], cwd: Optional[Path] = None,
-                   check: bool = True, env: Optional[dict] = None) -> subprocess.CompletedProcess:
-        """Run a command with proper error handling."""
-        try:
-            self.logger.debug(f"Running: {' '.join(command)}")
-            result = subprocess.run(
-                command,
-                cwd=cwd,
-                check=check,
-                capture_output=True,
-                text=True,
-                env=env
-            )
-            return result
-        except subprocess.CalledProcessError as e:
+                   check: bool = True, env: Optional[dict] = None,
+                   capture: bool = False) -> subprocess.CompletedProcess:
+        """Run a command with proper error handling.
+
+        Output streams straight to the terminal unless ``capture`` is set, in
+        which case it is spooled to temporary files rather than Python pipes
+        and returned as undecoded bytes.
+        """
+        self.logger.debug(f"Running: {' '.join(command)}")
+        if not capture:
+            if cwd is None and hasattr(os, "posix_spawnp"):
+                returncode = self._spawn_fast(command, env)
+            else:
+                returncode = subprocess.run(command, cwd=cwd, env=env).returncode
+            if check and returncode != 0:
+                self.logger.error(f"Command failed: {' '.join(command)}")
+                raise subprocess.CalledProcessError(returncode, command)
+            return subprocess.CompletedProcess(command, returncode)
+
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            result = subprocess.run(command, cwd=cwd, env=env, stdout=out, stderr=err)
+            out.seek(0)
+            stdout = out.read()
+            stderr = b""
+            if result.returncode != 0:
+                err.seek(0)
+                stderr = err.read()
+
+        if check and result.returncode != 0:
             self.logger.error(f"Command failed: {' '.join(command)}")
-            self.logger.error(f"Error output: {e.stderr}")
+            self.logger.error(f"Error output: {stderr.decode(errors='replace')}")
+            raise subprocess.CalledProcessError(result.returncode, command, stdout, stderr)
+        return subprocess.CompletedProcess(command, result.returncode, stdout, stderr)
+
+    @staticmethod
+    def _spawn_fast(argv: List[str], env: Optional[dict] = None) -> int:
+        """Run argv via posix_spawnp with inherited stdio and return its exit code.
+
+        Skips the pipe and bookkeeping setup of subprocess for commands whose
+        output goes straight to the terminal. posix_spawn cannot change the
+        working directory, so callers needing ``cwd`` use subprocess instead.
+        """
+        pid = os.posix_spawnp(argv[0], argv, os.environ if env is None else env,
+                              setsigdef=_RESTORED_SIGNALS)
+        try:
+            _, status = os.waitpid(pid, 0)
+        except BaseException:
+            # Like subprocess.run, kill and reap the child before propagating (e.g. Ctrl-C)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            os.waitpid(pid, 0)
             raise
+        # os.waitstatus_to_exitcode needs Python 3.9; decode like subprocess does
+        if os.WIFSIGNALED(status):
+            return -os.WTERMSIG(status)
+        return os.WEXITSTATUS(status)
+
+    def _sourced_spack_env(self, spack_root: Path) -> dict:
+        """Return the variables Spack's setup-env.sh adds or changes, cached per root."""
+        if spack_root not in self._spack_env_cache:
+            self._spack_env_cache[spack_root] = self._source_spack_env(spack_root)
+        return dict(self._spack_env_cache[spack_root])
+
+    def _source_spack_env(self, spack_root: Path) -> dict:
+        """Source Spack's setup-env.sh and return the variables it adds or changes.
+
+        The result is also persisted under the install directory and reused
+        across runs until the script contents, Spack root or inherited
+        environment change.
+        """
+        setup_script = spack_root / "share" / "spack" / "setup-env.sh"
+        try:
+            script = setup_script.read_bytes()
+        except FileNotFoundError:
+            return {}
+
+        # The delta is relative to the inherited environment, so it is part of the key
+        digest = hashlib.blake2b(script)
+        digest.update(b'\0' + str(spack_root).encode())
+        for key, value in sorted(os.environ.items()):
+            if key not in _SHELL_VOLATILE_VARS:
+                digest.update(f"\0{key}={value}".encode())
+        script_hash = digest.hexdigest()
+
+        cache_file = self.install_dir / SPACK_ENV_CACHE
+        try:
+            cached = json.loads(cache_file.read_text())
+            if cached["hash"] == script_hash:
+                return cached["env"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        # For bash-compatible systems
+        setup_cmd = f"source {setup_script} && env"
+        result = self.run_command(["bash", "-c", setup_cmd], capture=True)
+
+        # Parse environment variables from output, keeping only those that differ
+        sourced = {key: value
+                   for key, sep, value in (line.partition('=') for line in result.stdout.decode().splitlines())
+                   if sep and key not in _SHELL_VOLATILE_VARS and os.environ.get(key) != value}
+        try:
+            cache_file.write_text(json.dumps({"hash": script_hash, "env": sourced}))
+        except OSError as e:
+            self.logger.warning(f"Could not save Spack environment cache: {e}")
+        return sourced
 
     def install_spack_dependencies(self, spack_root: Path) -> Path:
         """Install required Spack dependencies."""
         self.logger.info("Installing Spack dependencies...")
 
-        # Set up environment
+        # Set up environment once; every subprocess below inherits it
         spack_bin = spack_root / "bin" / "spack"
-        env = os.environ.copy()
-        env['SPACK_ROOT'] = str(spack_root)
-        env['PATH'] = f"{spack_root}/bin:{env['PATH']}"
+        spack_bin_dir = f"{spack_root}/bin"
+        os.environ['SPACK_ROOT'] = str(spack_root)
+        if spack_bin_dir not in os.environ['PATH'].split(os.pathsep):
+            os.environ['PATH'] = f"{spack_bin_dir}{os.pathsep}{os.environ['PATH']}"
 
         # Source spack setup
-        setup_script = spack_root / "share" / "spack" / "setup-env.sh"
-        if setup_script.exists():
-            # For bash-compatible systems
-            setup_cmd = f"source {setup_script} && env"
-            result = self.run_command(["bash", "-c", setup_cmd], env=env)
-            # Parse environment variables from output
-            for line in result.stdout.splitlines():
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    env[key] = value
+        os.environ.update(self._sourced_spack_env(spack_root))
 
-        # Install dependencies
-        self.run_command([
-            str(spack_bin), "install", "--only", "dependencies",
+        # Install dependencies; the remaining specs build on these artifacts
+        spack_install = [str(spack_bin), "install", "-j", str(self.jobs)]
+        self.run_command(spack_install + [
+            "--only", "dependencies",
             "hpctoolkit", "^dyninst@master", "^binutils@2.34+libiberty~nls"
-        ], env=env)
-
-        self.run_command([
-            str(spack_bin), "install", "libmonitor@master+dlopen+hpctoolkit"
-        ], env=env)
+        ])
 
-        self.run_command([str(spack_bin), "install", "mbedtls", "gotcha"], env=env)
+        remaining = [["libmonitor@master+dlopen+hpctoolkit"], ["mbedtls", "gotcha"]]
+        if self.verbose:
+            # One spec at a time keeps build logs separate so failures are easy to bisect
+            for specs in remaining:
+                self.run_command(spack_install + specs)
+        else:
+            # One spack process pays the interpreter and concretizer startup once
+            fused = spack_install + [spec for specs in remaining for spec in specs]
+            self.logger.info(f"Running: {' '.join(fused)}")
+            self.run_command(fused)
 
         # Find spack libraries directory
-        result = self.run_command([str(spack_bin), "find", "--path", "boost"],
-                                env=env, capture_output=True)
-        boost_path = result.stdout.strip().split()[-1]
+        result = self.run_command([str(spack_bin), "find", "--path", "boost"], capture=True)
+        # Only the last token of the last line is needed; avoid splitting or decoding all output
+        tail = result.stdout.rstrip().rpartition(b'\n')[2]
+        boost_path = tail.rsplit(None, 1)[-1].decode()
         spack_libs_dir = Path(boost_path).parent
 
         self.logger.info(f"Spack libraries installed in: {spack_libs_dir}")
@@ -106,26 +296,25 @@ class GPAInstaller:
             raise FileNotFoundError("HPCToolkit source directory missing")
 
         # Clean previous build
-        if build_dir.exists():
+        try:
             shutil.rmtree(build_dir)
+        except FileNotFoundError:
+            pass
         build_dir.mkdir()
 
         # Configure
-        cuda_path = Path("/usr/local/cuda")
-        cupti_path = cuda_path / "extras" / "CUPTI"
-
         configure_cmd = [
             "../configure",
             f"--prefix={self.install_dir}/hpctoolkit",
-            f"--with-cuda={cuda_path}",
-            f"--with-cupti={cupti_path}",
+            f"--with-cuda={_CUDA}",
+            f"--with-cupti={_CUPTI}",
             f"--with-spack={spack_libs_dir}"
         ]
 
         self.run_command(configure_cmd, cwd=build_dir)
 
         # Build and install
-        self.run_command(["make", "install", "-j8"], cwd=build_dir)
+        self.run_command(["make", "install", f"-j{self.jobs}"], cwd=build_dir)
 
         self.logger.info(f"HPCToolkit installed in: {self.install_dir}/hpctoolkit")
 
@@ -150,9 +339,7 @@ class GPAInstaller:
         dst_bin = self.install_dir / "bin"
 
         if src_bin.exists():
-            if dst_bin.exists():
-                shutil.rmtree(dst_bin)
-            shutil.copytree(src_bin, dst_bin)
+            shutil.copytree(src_bin, dst_bin, dirs_exist_ok=True, copy_function=_link_or_copy)
             self.logger.info(f"Copied binaries to: {dst_bin}")
         else:
             self.logger.warning("Source bin directory not found")
@@ -192,10 +379,25 @@ def main():
         type=Path,
         help="Existing Spack installation directory (optional)"
     )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=_positive_int,
+        help=("Parallel build jobs (default: $GPA_BUILD_JOBS or CPU count); "
+              f"capped at $GPA_MAX_BUILD_JOBS, default {MAX_BUILD_JOBS}")
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Log every command and run each Spack install step separately"
+    )
 
     args = parser.parse_args()
 
-    installer = GPAInstaller(args.install_dir, args.spack_dir)
+    try:
+        installer = GPAInstaller(args.install_dir, args.spack_dir, args.jobs,
+                                 verbose=args.verbose)
+    except ValueError as e:
+        parser.error(str(e))
     installer.install()
 
 if __name__ == "__main__":
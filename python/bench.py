@@ -33,10 +33,13 @@ class Config:
     def setup_logging(self) -> None:
         """Configure logging based on current settings."""
         level = logging.DEBUG if self.debug else self.log_level
-        logging.basicConfig(
-            level=level,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
+        # Configure the root logger once per process; later calls only adjust our level
+        if not logging.getLogger().handlers:
+            logging.basicConfig(
+                level=level,
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+        logging.getLogger(__name__).setLevel(level)
 
 @dataclass(frozen=True)
 class TestCase:
@@ -6,61 +6,177 @@ Handles data setup and benchmark execution with modern Python practices.
 """
 
 import argparse
+import logging
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
+
+# Concurrent downloads for --data-manifest; the work is network/disk bound
+MAX_DOWNLOAD_WORKERS = 16
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# Seconds a single connect or read may stall before the download is abandoned
+DOWNLOAD_TIMEOUT = 60
 
 class BenchmarkRunner:
     """Handles GPA benchmark execution with modern practices."""
 
-    def __init__(self):
-        self.project_root = Path.cwd()
+    _logger: Optional[logging.Logger] = None
+
+    def __init__(self, quiet: bool = False, project_root: Optional[Path] = None):
+        self.project_root = project_root or Path.cwd()
         self.benchmark_dir = self.project_root / "GPA-Benchmark"
         self.python_dir = self.project_root / "python"
+        self.quiet = quiet
         self.logger = self._setup_logging()
 
-    def _setup_logging(self):
+    @classmethod
+    def _setup_logging(cls) -> logging.Logger:
         """Set up logging for benchmark execution."""
-        import logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s'
-        )
-        return logging.getLogger(__name__)
+        if cls._logger is None:
+            if not logging.getLogger().handlers:
+                logging.basicConfig(
+                    level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s'
+                )
+            cls._logger = logging.getLogger(__name__)
+        return cls._logger
+
+    def _spawn(self, command: List[str], cwd: Path, capture: bool) -> subprocess.CompletedProcess:
+        """Spawn a command, spooling its output to temporary files when capturing.
+
+        Captured output is only read back if the command fails.
+        """
+        if not capture:
+            return subprocess.run(command, cwd=cwd)
+
+        with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+            result = subprocess.run(command, cwd=cwd, stdout=out, stderr=err)
+            stdout = stderr = None
+            if result.returncode != 0:
+                out.seek(0)
+                err.seek(0)
+                stdout = out.read().decode(errors='replace')
+                stderr = err.read().decode(errors='replace')
+        return subprocess.CompletedProcess(command, result.returncode, stdout, stderr)
 
     def run_command(self, command: List[str], cwd: Optional[Path] = None,
-                   check: bool = True) -> subprocess.CompletedProcess:
-        """Run a command with proper error handling."""
-        try:
-            self.logger.debug(f"Running: {' '.join(command)}")
-            return subprocess.run(
-                command,
-                cwd=cwd or self.project_root,
-                check=check,
-                capture_output=False,
-                text=True
-            )
-        except subprocess.CalledProcessError as e:
+                   check: bool = True, capture: bool = False) -> subprocess.CompletedProcess:
+        """Run a command with proper error handling.
+
+        With ``capture``, output is hidden and only logged if the command fails.
+        """
+        self.logger.debug(f"Running: {' '.join(command)}")
+        result = self._spawn(command, cwd or self.project_root, capture=capture)
+        if check and result.returncode != 0:
             self.logger.error(f"Command failed: {' '.join(command)}")
-            self.logger.error(f"Error output: {e.stderr}")
+            if result.stdout:
+                self.logger.error(f"Output: {result.stdout}")
+            if result.stderr:
+                self.logger.error(f"Error output: {result.stderr}")
+            raise subprocess.CalledProcessError(result.returncode, command,
+                                                result.stdout, result.stderr)
+        return result
+
+    def _download(self, url: str, dest: Path, cancelled: threading.Event) -> None:
+        """Stream a single URL to dest, giving up early once cancelled is set."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response, open(dest, "wb") as f:
+            while not cancelled.is_set():
+                chunk = response.read(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+
+    def _parse_manifest(self, manifest: Path, root: Path) -> List[Tuple[str, Path]]:
+        """Parse "URL DEST" manifest lines into (url, root / DEST) pairs.
+
+        Blank lines and lines starting with '#' are ignored.
+        """
+        entries = []
+        for lineno, line in enumerate(manifest.read_text().splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split(None, 1)
+            if len(fields) != 2:
+                raise ValueError(f"{manifest}:{lineno}: expected 'URL DEST', got {line!r}")
+            url, dest = fields
+            target = (root / dest).resolve()
+            try:
+                target.relative_to(root.resolve())
+            except ValueError:
+                raise ValueError(f"{manifest}:{lineno}: destination escapes the data directory: {dest!r}") from None
+            entries.append((url, target))
+        return entries
+
+    def download_manifest(self, manifest: Path) -> None:
+        """Download every "URL DEST" entry of a manifest concurrently.
+
+        Destinations are relative to the benchmark data directory. Files are
+        fetched into a staging directory that only becomes ``data/`` once every
+        download has succeeded, so a failed run is retried in full next time.
+        """
+        data_dir = self.benchmark_dir / "data"
+        staging_dir = self.benchmark_dir / "data.partial"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        entries = self._parse_manifest(manifest, staging_dir)
+
+        self.logger.info(f"Downloading {len(entries)} files from {manifest}...")
+        staging_dir.mkdir(parents=True)
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(entries) or 1))
+        futures = {}
+        try:
+            futures = {executor.submit(self._download, url, dest, cancelled): url
+                       for url, dest in entries}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except OSError:
+                    self.logger.error(f"Download failed: {futures[future]}")
+                    raise
+        except BaseException:
+            cancelled.set()
+            # shutdown(cancel_futures=True) needs Python 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            shutil.rmtree(staging_dir, ignore_errors=True)
             raise
+        executor.shutdown()
+        os.replace(staging_dir, data_dir)
 
-    def setup_data(self) -> None:
+    def setup_data(self, manifest: Optional[Path] = None) -> None:
         """Download and set up benchmark data if not present."""
-        data_dir = self.benchmark_dir / "data"
+        # One directory scan answers both the data and get_data.sh lookups
+        try:
+            entries = {entry.name for entry in os.scandir(self.benchmark_dir)}
+        except FileNotFoundError:
+            entries = set()
 
-        if data_dir.exists():
+        if "data" in entries:
             self.logger.info("Benchmark data already exists, skipping download")
             return
 
         self.logger.info("Setting up benchmark data...")
 
+        if manifest is not None:
+            self.download_manifest(manifest)
+            return
+
         # Change to benchmark directory
         get_data_script = self.benchmark_dir / "get_data.sh"
-        if get_data_script.exists():
+        if get_data_script.name in entries:
             self.logger.info("Running data download script...")
-            self.run_command(["bash", str(get_data_script)], cwd=self.benchmark_dir)
+            self.run_command(["bash", str(get_data_script)], cwd=self.benchmark_dir,
+                             capture=self.quiet)
         else:
             self.logger.warning("get_data.sh script not found, assuming data is pre-installed")
 
@@ -101,14 +217,25 @@ def main():
         action='store_true',
         help='Skip benchmark data setup (assume already downloaded)'
     )
+    parser.add_argument(
+        '--data-manifest',
+        type=Path,
+        help='Download benchmark data concurrently from a "URL DEST" manifest '
+             '(DEST relative to GPA-Benchmark/data) instead of get_data.sh'
+    )
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Suppress data download output unless it fails; benchmark results are always shown'
+    )
 
     # Parse known args, pass the rest to bench.py
     known_args, remaining_args = parser.parse_known_args()
 
-    runner = BenchmarkRunner()
+    runner = BenchmarkRunner(quiet=known_args.quiet)
 
     if not known_args.skip_data_setup:
-        runner.setup_data()
+        runner.setup_data(known_args.data_manifest)
 
     runner.run_benchmarks(remaining_args)
 
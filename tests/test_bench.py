@@ -2,6 +2,7 @@
 Tests for GPA benchmarking functionality.
 """
 
+import logging
 import pytest
 import sys
 from pathlib import Path
@@ -29,6 +30,19 @@ class TestConfig:
         # Should not raise any exceptions
         config.setup_logging()
 
+    def test_config_logging_setup_idempotent(self):
+        """Test repeated logging setup does not add root handlers."""
+        bench_logger = logging.getLogger('python.bench')
+        original_level = bench_logger.level
+        try:
+            Config().setup_logging()
+            handlers = list(logging.getLogger().handlers)
+            Config(debug=True).setup_logging()
+            assert logging.getLogger().handlers == handlers
+            assert bench_logger.level == logging.DEBUG
+        finally:
+            bench_logger.setLevel(original_level)
+
 class TestTestCase:
     """Test TestCase dataclass."""
 
@@ -0,0 +1,217 @@
+"""
+Tests for the GPA installer.
+"""
+
+import errno
+import logging
+import os
+import pytest
+import shutil
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import install
+from install import GPAInstaller, MAX_BUILD_JOBS, clamp_build_jobs, default_build_jobs
+
+@pytest.fixture(autouse=True)
+def clean_build_env(monkeypatch):
+    """Run every test without the build-job overrides from the caller's shell."""
+    monkeypatch.delenv("GPA_BUILD_JOBS", raising=False)
+    monkeypatch.delenv("GPA_MAX_BUILD_JOBS", raising=False)
+
+class TestBuildJobs:
+    """Test parallel build job selection."""
+
+    def test_default_uses_cpu_count(self, monkeypatch):
+        """Test the default follows the CPU count below the cap."""
+        monkeypatch.setattr(install.os, "cpu_count", lambda: 4)
+        assert default_build_jobs() == 4
+
+    def test_default_capped_silently(self, monkeypatch, caplog):
+        """Test autodetected jobs are capped without a warning."""
+        monkeypatch.setattr(install.os, "cpu_count", lambda: 128)
+        with caplog.at_level(logging.WARNING):
+            assert default_build_jobs() == MAX_BUILD_JOBS
+        assert not caplog.records
+
+    def test_default_cap_overridable(self, monkeypatch):
+        """Test GPA_MAX_BUILD_JOBS raises the cap."""
+        monkeypatch.setattr(install.os, "cpu_count", lambda: 128)
+        monkeypatch.setenv("GPA_MAX_BUILD_JOBS", "96")
+        assert default_build_jobs() == 96
+
+    def test_env_request(self, monkeypatch):
+        """Test GPA_BUILD_JOBS overrides the CPU count."""
+        monkeypatch.setenv("GPA_BUILD_JOBS", "3")
+        assert default_build_jobs() == 3
+
+    @pytest.mark.parametrize("value", ["0", "-2", "many"])
+    def test_env_request_invalid(self, monkeypatch, value):
+        """Test invalid GPA_BUILD_JOBS values are rejected."""
+        monkeypatch.setenv("GPA_BUILD_JOBS", value)
+        with pytest.raises(ValueError, match="GPA_BUILD_JOBS"):
+            default_build_jobs()
+
+    def test_clamp_keeps_allowed_value(self, caplog):
+        """Test requests within the cap are used as given."""
+        with caplog.at_level(logging.WARNING):
+            assert clamp_build_jobs(8) == 8
+        assert not caplog.records
+
+    def test_clamp_reduces_with_warning(self, caplog):
+        """Test requests above the cap are reduced and reported."""
+        with caplog.at_level(logging.WARNING):
+            assert clamp_build_jobs(MAX_BUILD_JOBS * 2) == MAX_BUILD_JOBS
+        assert "GPA_MAX_BUILD_JOBS" in caplog.text
+
+    def test_clamp_respects_raised_cap(self, monkeypatch):
+        """Test an explicit request may exceed the default cap when allowed."""
+        monkeypatch.setenv("GPA_MAX_BUILD_JOBS", "64")
+        assert clamp_build_jobs(64) == 64
+
+    def test_clamp_rejects_non_positive(self):
+        """Test non-positive requests are rejected rather than adjusted."""
+        with pytest.raises(ValueError):
+            clamp_build_jobs(0)
+
+    def test_installer_explicit_jobs(self, tmp_path):
+        """Test GPAInstaller applies the cap to explicit job counts."""
+        assert GPAInstaller(tmp_path, jobs=6).jobs == 6
+        assert GPAInstaller(tmp_path, jobs=MAX_BUILD_JOBS + 1).jobs == MAX_BUILD_JOBS
+
+def make_spack_root(tmp_path, script):
+    """Create a fake Spack checkout whose setup-env.sh contains script."""
+    spack_root = tmp_path / "spack"
+    setup_dir = spack_root / "share" / "spack"
+    setup_dir.mkdir(parents=True)
+    (setup_dir / "setup-env.sh").write_text(script)
+    return spack_root
+
+def no_bash(*args, **kwargs):
+    raise AssertionError("setup-env.sh should not have been sourced")
+
+class TestSpackEnvCache:
+    """Test sourcing and persisting Spack's setup-env.sh environment."""
+
+    SCRIPT = "export GPA_TEST_SPACK=1\nexport GPA_TEST_DERIVED=/x:$GPA_TEST_INHERITED\n"
+
+    @pytest.fixture
+    def install_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("GPA_TEST_INHERITED", "/orig")
+        install_dir = tmp_path / "install"
+        install_dir.mkdir()
+        return install_dir
+
+    def test_cache_miss_writes_cache(self, tmp_path, install_dir):
+        """Test a first run sources the script and persists the result."""
+        spack_root = make_spack_root(tmp_path, self.SCRIPT)
+
+        env = GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        assert env["GPA_TEST_SPACK"] == "1"
+        assert env["GPA_TEST_DERIVED"] == "/x:/orig"
+        assert not {"_", "SHLVL", "PWD", "OLDPWD"} & env.keys()
+        assert (install_dir / install.SPACK_ENV_CACHE).exists()
+
+    def test_cache_hit_skips_bash(self, tmp_path, install_dir, monkeypatch):
+        """Test a later run reuses the persisted result without bash."""
+        spack_root = make_spack_root(tmp_path, self.SCRIPT)
+        expected = GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        installer = GPAInstaller(install_dir)
+        monkeypatch.setattr(installer, "run_command", no_bash)
+        assert installer._sourced_spack_env(spack_root) == expected
+
+    def test_script_change_invalidates(self, tmp_path, install_dir):
+        """Test editing setup-env.sh invalidates the persisted result."""
+        spack_root = make_spack_root(tmp_path, self.SCRIPT)
+        GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        (spack_root / "share" / "spack" / "setup-env.sh").write_text("export GPA_TEST_SPACK=2\n")
+        env = GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        assert env["GPA_TEST_SPACK"] == "2"
+
+    def test_inherited_env_change_invalidates(self, tmp_path, install_dir, monkeypatch):
+        """Test a change in the caller's environment invalidates the result."""
+        spack_root = make_spack_root(tmp_path, self.SCRIPT)
+        GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        monkeypatch.setenv("GPA_TEST_INHERITED", "/changed")
+        env = GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        assert env["GPA_TEST_DERIVED"] == "/x:/changed"
+
+    def test_unwritable_cache_warns(self, tmp_path, install_dir, caplog):
+        """Test a cache that cannot be saved does not abort the install."""
+        spack_root = make_spack_root(tmp_path, self.SCRIPT)
+        (install_dir / install.SPACK_ENV_CACHE).mkdir()
+
+        with caplog.at_level(logging.WARNING):
+            env = GPAInstaller(install_dir)._sourced_spack_env(spack_root)
+
+        assert env["GPA_TEST_SPACK"] == "1"
+        assert "Could not save Spack environment cache" in caplog.text
+
+    def test_missing_setup_script(self, tmp_path, install_dir):
+        """Test a Spack root without setup-env.sh contributes nothing."""
+        assert GPAInstaller(install_dir)._sourced_spack_env(tmp_path / "nospack") == {}
+
+class TestCopyBinaries:
+    """Test installing GPA binaries."""
+
+    @pytest.fixture
+    def installer(self, tmp_path):
+        source_dir = tmp_path / "src"
+        (source_dir / "bin").mkdir(parents=True)
+        (source_dir / "bin" / "gpa").write_text("#!/bin/sh\n")
+        return GPAInstaller(tmp_path / "install", source_dir=source_dir)
+
+    def test_hardlinks_binaries(self, installer):
+        """Test binaries are hardlinked, and re-running replaces them."""
+        installer.copy_binaries()
+        installer.copy_binaries()
+
+        src = installer.source_dir / "bin" / "gpa"
+        dst = installer.install_dir / "bin" / "gpa"
+        assert dst.stat().st_ino == src.stat().st_ino
+
+    def test_replaces_existing_file(self, installer):
+        """Test a stale destination file is replaced by a link to the source."""
+        dst = installer.install_dir / "bin" / "gpa"
+        dst.parent.mkdir(parents=True)
+        dst.write_text("stale")
+
+        installer.copy_binaries()
+
+        assert dst.read_text() == "#!/bin/sh\n"
+        assert dst.stat().st_ino == (installer.source_dir / "bin" / "gpa").stat().st_ino
+
+    @pytest.mark.parametrize("err", [errno.EXDEV, errno.EPERM])
+    def test_falls_back_to_copy(self, installer, monkeypatch, err):
+        """Test binaries are copied when they cannot be hardlinked."""
+        def cannot_link(src, dst):
+            raise OSError(err, os.strerror(err))
+        monkeypatch.setattr(install.os, "link", cannot_link)
+
+        installer.copy_binaries()
+
+        src = installer.source_dir / "bin" / "gpa"
+        dst = installer.install_dir / "bin" / "gpa"
+        assert dst.read_text() == src.read_text()
+        assert dst.stat().st_ino != src.stat().st_ino
+
+    def test_other_link_errors_propagate(self, installer, monkeypatch):
+        """Test unexpected link errors are not masked by the copy fallback."""
+        def cannot_link(src, dst):
+            raise OSError(errno.EIO, os.strerror(errno.EIO))
+        monkeypatch.setattr(install.os, "link", cannot_link)
+
+        with pytest.raises(shutil.Error):
+            installer.copy_binaries()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
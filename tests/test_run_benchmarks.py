@@ -0,0 +1,87 @@
+"""
+Tests for benchmark data setup in the GPA benchmark runner.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from run_benchmarks import BenchmarkRunner
+
+@pytest.fixture
+def runner(tmp_path):
+    """BenchmarkRunner rooted in an empty temporary project."""
+    (tmp_path / "GPA-Benchmark").mkdir()
+    return BenchmarkRunner(project_root=tmp_path)
+
+def write_manifest(tmp_path, lines):
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("\n".join(lines) + "\n")
+    return manifest
+
+class TestDataManifest:
+    """Test manifest-driven data downloads."""
+
+    def test_download_manifest(self, tmp_path, runner):
+        """Test every manifest entry lands under data/."""
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a").write_text("hello")
+        (src / "b").write_text("world")
+        manifest = write_manifest(tmp_path, [
+            "# comment",
+            f"{(src / 'a').as_uri()} nested/a.txt",
+            "",
+            f"{(src / 'b').as_uri()} b.txt",
+        ])
+
+        runner.setup_data(manifest)
+
+        data_dir = runner.benchmark_dir / "data"
+        assert (data_dir / "nested" / "a.txt").read_text() == "hello"
+        assert (data_dir / "b.txt").read_text() == "world"
+        assert not (runner.benchmark_dir / "data.partial").exists()
+
+    def test_failed_download_leaves_no_data(self, tmp_path, runner):
+        """Test a failed download does not leave a partial data/ behind."""
+        src = tmp_path / "src"
+        src.mkdir()
+        (src / "a").write_text("hello")
+        manifest = write_manifest(tmp_path, [
+            f"{(src / 'a').as_uri()} a.txt",
+            f"{(src / 'missing').as_uri()} missing.txt",
+        ])
+
+        with pytest.raises(OSError):
+            runner.setup_data(manifest)
+
+        assert not (runner.benchmark_dir / "data").exists()
+        assert not (runner.benchmark_dir / "data.partial").exists()
+
+    def test_malformed_line(self, tmp_path, runner):
+        """Test malformed manifest lines are reported with their line number."""
+        manifest = write_manifest(tmp_path, ["# comment", "file:///only-a-url"])
+
+        with pytest.raises(ValueError, match=r"manifest\.txt:2:"):
+            runner.setup_data(manifest)
+
+    def test_destination_outside_data_dir(self, tmp_path, runner):
+        """Test destinations may not escape the data directory."""
+        manifest = write_manifest(tmp_path, ["file:///x ../../escape.txt"])
+
+        with pytest.raises(ValueError, match="escapes"):
+            runner.setup_data(manifest)
+
+    def test_existing_data_skips_download(self, tmp_path, runner):
+        """Test existing data/ short-circuits the manifest download."""
+        (runner.benchmark_dir / "data").mkdir()
+        manifest = write_manifest(tmp_path, ["file:///missing missing.txt"])
+
+        # Would raise if the manifest were processed
+        runner.setup_data(manifest)
+
+if __name__ == "__main__":
+    pytest.main([__file__])